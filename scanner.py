@@ -5,7 +5,15 @@ Based on pyRF24 scanner example
 """
 
 import argparse
+import json
+import multiprocessing
+import os
+import sys
 import time
+from binascii import hexlify
+from collections import namedtuple
+from functools import partial
+from itertools import compress
 
 from pyrf24 import (
     RF24,
@@ -17,74 +25,196 @@ from pyrf24 import (
     address_repr,
 )
 
+# --data-rate choice -> (pyrf24 constant, display name)
+DATA_RATES = {
+    "1": (RF24_1MBPS, "1 Mbps"),
+    "2": (RF24_2MBPS, "2 Mbps"),
+    "250": (RF24_250KBPS, "250 kbps"),
+}
+
+# How long RX must settle on a channel before RPD is meaningful
+RPD_SETTLE_NS = 130_000
+
+# "Worst possible" 2-byte pipe addresses: they look like a preamble, so the
+# radio treats almost any RF energy as the start of a packet
+NOISE_ADDRESSES = (
+    b"\x55\x55",
+    b"\xaa\xaa",
+    b"\x0a\xaa",
+    b"\xa0\xaa",
+    b"\x00\xaa",
+    b"\xab\xaa",
+)
+
+# Spectrum display glyph for a (clamped) signal count; 0 is shown as "-"
+HEX_DIGITS = b"-123456789ABCDEF"
+
+# A payload captured by scan_packets; a tuple is far lighter than a dict when
+# a busy channel yields thousands of them. timestamp is an int: nanoseconds
+# since the scan started, only converted to seconds for display
+Packet = namedtuple("Packet", "timestamp data length")
+
+# Channel hit counts from earlier packet scans, keyed by --data-rate
+HISTORY_FILE = os.path.expanduser("~/.pi-sniffrf/history.json")
+
+
+def load_history(path=HISTORY_FILE):
+    """Load the per-channel hit counts saved by :func:`save_history`"""
+    try:
+        with open(path) as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(history, dict):
+        return {}
+    # anything but a full row of counts is treated as a cold start
+    return {
+        rate: counts
+        for rate, counts in history.items()
+        if isinstance(counts, list)
+        and len(counts) == 126
+        and all(isinstance(count, int) for count in counts)
+    }
+
+
+def save_history(history, path=HISTORY_FILE):
+    """Atomically replace the history file with ``history``"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f)
+    os.replace(tmp_path, path)
+
+
+def spin_wait(ns):
+    """Busy-wait for ``ns`` nanoseconds
+
+    ``time.sleep()`` already sleeps with clock_nanosleep() on Linux, but the
+    wake-up still goes through the scheduler and routinely lands tens of
+    microseconds late. Spinning burns a core in exchange for a dwell that is
+    accurate to about a microsecond.
+    """
+    deadline = time.perf_counter_ns() + ns
+    while time.perf_counter_ns() < deadline:
+        pass
+
+
+def rpd_settle(precise_dwell=False):
+    """Return a callable that waits out :data:`RPD_SETTLE_NS`"""
+    if precise_dwell:
+        return partial(spin_wait, RPD_SETTLE_NS)
+    return partial(time.sleep, RPD_SETTLE_NS / 1e9)
+
+
+def configure_for_noise(radio):
+    """Configure the radio to receive anything, not just well-formed packets
+
+    Auto-ack, CRC and retries are disabled and two 2 byte addresses that
+    resemble a preamble are opened, so noise is delivered as payloads.
+    """
+    radio.set_auto_ack(False)
+    radio.dynamic_payloads = False
+    radio.crc_length = RF24_CRC_DISABLED
+    radio.set_retries(0, 0)
+    radio.address_width = 2
+    radio.open_rx_pipe(1, b"\0\x55")
+    radio.open_rx_pipe(0, b"\0\xaa")
 
-def scan_channel_rpd(radio, channel, duration=0.1):
+
+def scan_channel_rpd(radio, channel, duration=0.1, precise_dwell=False):
     """Scan a single channel using RPD (Received Power Detection)"""
     radio.channel = channel
     radio.listen = True
-    time.sleep(0.00013)  # Wait 130 microseconds for RPD
+    rpd_settle(precise_dwell)()  # Wait 130 microseconds for RPD
     rpd_detected = radio.rpd
     radio.listen = False
     return rpd_detected
 
 
-def scan_spectrum(radio, duration=30):
-    """Scan all 126 channels using RPD with multiple detection methods"""
-    print("Scanning spectrum using RPD (Received Power Detection)...")
-    print("0" * 100 + "1" * 26)
-    for i in range(13):
-        print(str(i % 10) * (10 if i < 12 else 6), sep="", end="")
-    print("")
-    for i in range(126):
-        print(str(i % 10), sep="", end="")
-    print("\n" + "~" * 126)
+def sweep_spectrum(radio, duration=30, precise_dwell=False, channels=range(126)):
+    """Sweep ``channels`` using RPD for ``duration`` seconds
+
+    This is a generator: it yields the 126 per-channel detection counts after
+    every pass so callers can display or analyse them while the next pass is
+    acquired. The same list is updated in place; copy it to keep a snapshot.
 
+    :param bool precise_dwell: Spin instead of sleeping through the RPD
+        settling time, see :func:`spin_wait`.
+    :param channels: The channels to sweep; the others stay at 0.
+    """
     # Configure for aggressive noise detection (like C++ scanner)
     radio.set_auto_ack(False)
     radio.disable_crc()
     radio.address_width = 2
 
     # Use multiple "worst possible" addresses to catch any RF signal
-    noise_addresses = [
-        b"\x55\x55",
-        b"\xaa\xaa",
-        b"\x0a\xaa",
-        b"\xa0\xaa",
-        b"\x00\xaa",
-        b"\xab\xaa",
-    ]
-
-    for i, addr in enumerate(noise_addresses):
+    for i, addr in enumerate(NOISE_ADDRESSES):
         radio.open_rx_pipe(i, addr)
 
     signals = [0] * 126
-    num_reps = 100  # Number of passes through spectrum
 
     start_timer = time.monotonic()
-    rep_counter = 0
 
-    while time.monotonic() - start_timer < duration:
-        for channel in range(126):
+    # bind the hot loop's callables to locals once instead of looking them
+    # up again for every channel of every pass
+    now = time.monotonic
+    settle = rpd_settle(precise_dwell)
+    available = radio.available
+    flush_rx = radio.flush_rx
+
+    while now() - start_timer < duration:
+        for channel in channels:
             radio.channel = channel
             radio.listen = True
-            time.sleep(0.00013)  # 130 microseconds
+            settle()  # 130 microseconds
 
-            # Multiple detection methods like C++ scanner
-            found_signal = radio.rpd or radio.available() or radio.test_rpd()
+            # RPD or anything that made it into the RX FIFO; test_rpd()
+            # reads the same register as rpd, so it is not polled again
+            found_signal = radio.rpd or available()
 
             radio.listen = False
 
             if found_signal:
                 signals[channel] += 1
-                radio.flush_rx()  # Discard noise packets
-
-            # Visual output
-            sig_cnt = signals[channel]
-            print(
-                ("%X" % min(15, sig_cnt)) if sig_cnt else "-",
-                sep="",
-                end="" if channel < 125 else "\r",
-            )
+                flush_rx()  # Discard noise packets
+
+        yield signals
+
+
+def count_rpd(radio, duration=30, precise_dwell=False, channels=range(126)):
+    """Run :func:`sweep_spectrum` to the end and return the final counts"""
+    signals = [0] * 126
+    for signals in sweep_spectrum(radio, duration, precise_dwell, channels):
+        pass
+    return signals
+
+
+def scan_spectrum(radio, duration=30, precise_dwell=False):
+    """Scan all 126 channels using RPD with multiple detection methods
+
+    The spectrum line is redrawn after every pass of :func:`sweep_spectrum`.
+    """
+    print("Scanning spectrum using RPD (Received Power Detection)...")
+    print("0" * 100 + "1" * 26)
+    for i in range(13):
+        print(str(i % 10) * (10 if i < 12 else 6), sep="", end="")
+    print("")
+    for i in range(126):
+        print(str(i % 10), sep="", end="")
+    print("\n" + "~" * 126)
+
+    signals = [0] * 126
+    num_reps = 100  # Number of passes through spectrum
+    rep_counter = 0
+    line = bytearray(b"-" * 126 + b"\r")
+
+    for signals in sweep_spectrum(radio, duration, precise_dwell):
+        for channel, count in enumerate(signals):
+            line[channel] = HEX_DIGITS[min(15, count)]
+
+        # Visual output: one write per pass rather than one per channel
+        sys.stdout.write(line.decode())
+        sys.stdout.flush()
 
         rep_counter += 1
         if rep_counter >= num_reps:
@@ -94,6 +224,57 @@ def scan_spectrum(radio, duration=30):
     return signals
 
 
+def _begin_radio(pins):
+    """Start the radio on ``(ce_pin, csn_pin)`` or raise :class:`OSError`"""
+    radio = RF24(*pins)
+    if not radio.begin():
+        raise OSError(f"nRF24 on CE={pins[0]}, CSN={pins[1]} not responding")
+    return radio
+
+
+def _probe_radio(pins):
+    """Check from the child that the second radio answers before sweeping"""
+    _begin_radio(pins)
+
+
+def _rpd_worker(pins, data_rate, channels, duration, precise_dwell):
+    """Child process side of :func:`scan_spectrum_split`
+
+    pyrf24 radios can't be pickled, so the child sets up its own.
+    """
+    radio = _begin_radio(pins)
+    radio.set_pa_level(RF24_PA_LOW)
+    radio.set_data_rate(DATA_RATES[data_rate][0])
+    return count_rpd(radio, duration, precise_dwell, channels)
+
+
+def scan_spectrum_split(
+    radio, second_pins, data_rate, duration=30, precise_dwell=False
+):
+    """Split the RPD sweep between ``radio`` and a second nRF24L01+
+
+    The second radio (given as ``(ce_pin, csn_pin)``) sweeps the upper half
+    of the band from its own process while ``radio`` sweeps the lower half,
+    so every channel is sampled twice as often in the same wall-clock time.
+
+    Raises :class:`OSError` before any scanning if the second radio doesn't
+    respond.
+    """
+    # spawn rather than fork so the child doesn't inherit this radio's SPI
+    # and GPIO handles
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        # fail now rather than after the primary radio's whole sweep
+        pool.apply(_probe_radio, (second_pins,))
+        print(f"Scanning spectrum with two radios for {duration} seconds...")
+        upper = pool.apply_async(
+            _rpd_worker,
+            (second_pins, data_rate, range(63, 126), duration, precise_dwell),
+        )
+        lower = count_rpd(radio, duration, precise_dwell, range(63))
+        upper = upper.get()
+    return [a + b for a, b in zip(lower, upper)]
+
+
 def noise(radio, timeout=1, channel=None):
     """Print a stream of detected noise for duration of time.
 
@@ -106,98 +287,245 @@ def noise(radio, timeout=1, channel=None):
     radio.listen = True
     timeout += time.monotonic()
     while time.monotonic() < timeout:
-        signal = radio.read(radio.payload_size)
-        if signal:
-            print(address_repr(signal, False, " "))
+        # empty the whole RX FIFO (3 payloads deep) on every pass
+        while radio.available():
+            print(address_repr(radio.read(radio.payload_size), False, " "))
     radio.listen = False
     while not radio.is_fifo(False, True):
         # dump the left overs in the RX FIFO
         print(address_repr(radio.read(), False, " "))
 
 
-def scan_noise(radio, duration=30, channels=None):
-    """Scan multiple channels for noise/data"""
+def scan_noise(radio, duration=30, channels=None, dwell=0.002):
+    """Scan multiple channels for noise/data
+
+    The channels are swept round-robin with a short ``dwell`` on each, many
+    times over, instead of spending ``duration / len(channels)`` on each one
+    in turn. A burst on any channel is then caught no matter which channel
+    the scan happened to be on when it started. The default dwell is long
+    enough for a full 32 byte payload at 250 kbps.
+    """
     if channels is None:
         channels = list(range(76, 86))  # Focus on common remote channels
 
     print(f"Scanning {len(channels)} channels for noise/data...")
     print("Press buttons on MS-8 remote while scanning...")
 
-    results = {}
+    now = time.monotonic
+    available = radio.available
+    read = radio.read
+    payload_size = radio.payload_size
+    packets = {channel: [] for channel in channels}
+    deadline = now() + duration
 
-    for channel in channels:
-        print(f"\nChannel {channel}:")
-        radio.channel = channel
-        radio.listen = True
+    while now() < deadline:
+        for channel in channels:
+            append = packets[channel].append
+            radio.channel = channel
+            radio.listen = True
 
-        packets = []
-        start_time = time.time()
+            dwell_end = now() + dwell
+            while now() < dwell_end:
+                # empty the whole RX FIFO (3 payloads deep) on every pass
+                while available():
+                    append(read(payload_size))
 
-        while time.time() - start_time < duration / len(channels):
-            signal = radio.read(radio.payload_size)
-            if signal:
-                packets.append(signal)
-                print(f"  {address_repr(signal, False, ' ')}")
+            radio.listen = False
 
-        radio.listen = False
+            # Clear any remaining data before moving to the next channel
+            while available():
+                append(read(payload_size))
 
-        # Clear any remaining data
-        while not radio.is_fifo(False, True):
-            signal = radio.read()
-            if signal:
-                packets.append(signal)
-                print(f"  {address_repr(signal, False, ' ')}")
+    # Print once scanning is done; formatting every packet while listening
+    # slows the read loop down more than the read itself
+    results = {}
+    for channel in channels:
+        print(f"\nChannel {channel}:")
+        for signal in packets[channel]:
+            print(f"  {address_repr(signal, False, ' ')}")
 
-        if packets:
-            results[channel] = packets
-            print(f"  Found {len(packets)} signals on channel {channel}")
+        if packets[channel]:
+            results[channel] = packets[channel]
+            print(f"  Found {len(packets[channel])} signals on channel {channel}")
         else:
             print(f"  No signals on channel {channel}")
 
     return results
 
 
-def scan_packets(radio, duration=30, output_file=None):
-    """Scan for actual packets (not just RPD)"""
-    print(f"Scanning for packets on all channels for {duration} seconds...")
+class IrqLine:
+    """The nRF24L01's active-low IRQ output, wired to a GPIO (BCM numbering)
 
-    # Configure for packet reception
-    radio.set_auto_ack(False)
-    radio.dynamic_payloads = False
-    radio.crc_length = RF24_CRC_DISABLED
-    radio.set_retries(0, 0)
-    radio.address_width = 2
-    radio.open_rx_pipe(1, b"\0\x55")
-    radio.open_rx_pipe(0, b"\0\xaa")
+    Reading a GPIO level is a memory-mapped load, far cheaper than the SPI
+    STATUS read behind ``radio.available()``, so hot loops can check this
+    first and only talk to the radio once a payload has actually arrived.
+    """
 
-    results = {}
-    channels = list(range(126))
+    def __init__(self, radio, pin):
+        import RPi.GPIO as GPIO  # only needed when an IRQ line is wired up
+
+        self._gpio = GPIO
+        self.pin = pin
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        # only "RX data ready" may pull the line low; read() clears it again
+        radio.mask_irq(True, True, False)
+
+    def asserted(self):
+        """Return True while a received payload is waiting in the RX FIFO"""
+        return not self._gpio.input(self.pin)
+
+    def wait(self, deadline):
+        """Block until a payload arrives or ``deadline`` (perf_counter_ns) passes
+
+        Each wait is capped at 10 ms so that a payload landing between the
+        level check and arming the edge detector costs at most one slice.
+        """
+        if self.asserted():
+            return True
+        timeout_ms = (deadline - time.perf_counter_ns()) // 1_000_000
+        timeout_ms = max(1, min(10, timeout_ms))
+        edge = self._gpio.wait_for_edge(
+            self.pin, self._gpio.FALLING, timeout=timeout_ms
+        )
+        return edge is not None
 
-    for channel in channels:
-        radio.channel = channel
-        radio.listen = True
+    def close(self):
+        """Release the GPIO pin"""
+        self._gpio.cleanup(self.pin)
 
-        packets = []
-        start_time = time.time()
 
-        while time.time() - start_time < 0.1:  # 100ms per channel
-            if radio.available():
-                data = radio.read(radio.payload_size)
-                if data:
-                    packets.append(
-                        {"timestamp": time.time(), "data": data, "length": len(data)}
-                    )
-            time.sleep(0.001)
+def capture_channel(radio, channel, dwell, irq=None, start=None):
+    """Collect packets received on a single channel for ``dwell`` seconds
 
-        radio.listen = False
+    :param IrqLine irq: If given, the loop sleeps on the IRQ line instead of
+        polling the radio, so quiet channels cost no SPI traffic or CPU.
+    :param int start: The ``time.perf_counter_ns()`` value packet timestamps
+        are relative to. Defaults to the start of this dwell.
+    """
+    now = time.perf_counter_ns
+    available = radio.available
+    read = radio.read
+    payload_size = radio.payload_size
+    radio.channel = channel
+    radio.listen = True
 
-        if packets:
-            results[channel] = packets
-            print(f"Channel {channel}: {len(packets)} packets")
+    packets = []
+    deadline = now() + int(dwell * 1e9)
+    if start is None:
+        start = now()
+
+    # Without an IRQ line, poll without sleeping: a 32 byte payload is ~256 us
+    # on air at 1 Mbps, so even a 1 ms nap between polls could miss one
+    while now() < deadline:
+        if irq is not None:
+            if not irq.wait(deadline):
+                continue
+        elif not available():
+            continue
+        # drain every queued payload (the RX FIFO is 3 deep) before
+        # rechecking the clock so bursts don't overflow it
+        while available():
+            data = read(payload_size)
+            if data:
+                packets.append(Packet(now() - start, data, len(data)))
+
+    radio.listen = False
+    return packets
+
+
+def scan_packets(
+    radio,
+    duration=30,
+    output_file=None,
+    coarse_dwell=0.02,
+    prune=0.1,
+    prior=None,
+    irq=None,
+    cold_dwell=0.005,
+):
+    """Scan for actual packets (not just RPD)
+
+    A coarse sweep first visits every channel briefly. Channels with fewer
+    hits than ``prune`` times the busiest channel are then dropped and the
+    rest of ``duration`` is split between the channels that remain, in
+    proportion to how many packets each produced during the sweep.
+
+    :param list prior: Per-channel hit counts from earlier scans. When given,
+        the coarse sweep visits historically busy channels first and only
+        spends ``cold_dwell`` on channels that have never had a hit, so a
+        sweep of a known band finishes sooner.
+    :param IrqLine irq: Optional IRQ line, see :func:`capture_channel`.
+    """
+    print(f"Scanning for packets on all channels for {duration} seconds...")
+
+    configure_for_noise(radio)
+
+    results = {}
+    hits = [0] * 126
+    start = time.perf_counter_ns()
+    deadline = time.monotonic() + duration
+    order = range(126)
+    dwells = [coarse_dwell] * 126
+    if prior and any(prior):
+        order = sorted(order, key=prior.__getitem__, reverse=True)
+        dwells = [coarse_dwell if count else cold_dwell for count in prior]
+
+    # Coarse pass: keep sweeping the whole band until something turns up
+    while time.monotonic() < deadline and not any(hits):
+        for channel in order:
+            # a full sweep can outlast a short duration, so check every hop
+            if time.monotonic() >= deadline:
+                break
+            packets = capture_channel(radio, channel, dwells[channel], irq, start)
+            if packets:
+                results[channel] = packets
+                hits[channel] = len(packets)
+
+    # Refine: listen longer, but only on channels close to the busiest one
+    peak = max(hits)
+    survivors = [ch for ch, count in enumerate(hits) if count and count >= prune * peak]
+    remaining = deadline - time.monotonic()
+    if survivors and remaining > 0:
+        # busier channels get a proportionally bigger share of the budget
+        per_hit = remaining / sum(hits[ch] for ch in survivors)
+        for channel in survivors:
+            dwell = per_hit * hits[channel]
+            packets = capture_channel(radio, channel, dwell, irq, start)
+            results[channel].extend(packets)
+
+    # report in channel order, whatever order the prior swept them in
+    results = dict(sorted(results.items()))
+    for channel, packets in results.items():
+        print(f"Channel {channel}: {len(packets)} packets")
 
     return results
 
 
+def save_packets(filename, results):
+    """Write the results of :func:`scan_packets` to ``filename``"""
+    with open(filename, "wb") as f:
+        f.write(b"RF Packet Scan - %s\n" % time.strftime("%Y-%m-%d %H:%M:%S").encode())
+        f.write(b"=" * 50 + b"\n\n")
+        for channel, packets in results.items():
+            f.write(b"Channel %d: %d packets\n" % (channel, len(packets)))
+            # one bytes %-format per packet, hexlify()'d in C, straight into
+            # the binary buffer with no str -> bytes encode step
+            f.writelines(
+                b"  %.6f: %s\n" % (packet.timestamp / 1e9, hexlify(packet.data, b" "))
+                for packet in packets
+            )
+
+
+def parse_pins(text):
+    """Parse a ``CE,CSN`` command line value into a pair of ints"""
+    try:
+        ce_pin, csn_pin = (int(pin) for pin in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected CE,CSN but got {text!r}")
+    return ce_pin, csn_pin
+
+
 def main():
     parser = argparse.ArgumentParser(description="RF Scanner for nRF24L01+")
     parser.add_argument(
@@ -216,10 +544,32 @@ def main():
     )
     parser.add_argument(
         "--data-rate",
-        choices=["1", "2", "250"],
+        choices=list(DATA_RATES),
         default="1",
         help="Data rate: 1 (1Mbps), 2 (2Mbps), 250 (250kbps)",
     )
+    parser.add_argument(
+        "--history",
+        default=HISTORY_FILE,
+        help="File of channel hit counts used to prioritize packets mode "
+        "(an empty string disables it)",
+    )
+    parser.add_argument(
+        "--irq-pin",
+        type=int,
+        help="GPIO (BCM) wired to the nRF24 IRQ pin, used by packets mode",
+    )
+    parser.add_argument(
+        "--precise-dwell",
+        action="store_true",
+        help="Busy-wait the 130us RPD dwell for accurate timing (uses a full core)",
+    )
+    parser.add_argument(
+        "--second-radio",
+        type=parse_pins,
+        metavar="CE,CSN",
+        help="Pins of a second nRF24L01+ to split rpd mode's band with",
+    )
     args = parser.parse_args()
 
     # Initialize radio
@@ -232,25 +582,12 @@ def main():
     radio.set_pa_level(RF24_PA_LOW)
 
     # Set data rate
-    if args.data_rate == "2":
-        radio.set_data_rate(RF24_2MBPS)
-        print("Using 2 Mbps")
-    elif args.data_rate == "250":
-        radio.set_data_rate(RF24_250KBPS)
-        print("Using 250 kbps")
-    else:
-        radio.set_data_rate(RF24_1MBPS)
-        print("Using 1 Mbps")
+    rate, rate_name = DATA_RATES[args.data_rate]
+    radio.set_data_rate(rate)
+    print(f"Using {rate_name}")
 
     if args.mode == "noise":
-        # Configure for noise detection
-        radio.set_auto_ack(False)
-        radio.dynamic_payloads = False
-        radio.crc_length = RF24_CRC_DISABLED
-        radio.set_retries(0, 0)
-        radio.address_width = 2
-        radio.open_rx_pipe(1, b"\0\x55")
-        radio.open_rx_pipe(0, b"\0\xaa")
+        configure_for_noise(radio)
 
         print(
             f"Listening for noise on channel {args.channel or 'current'} for {args.duration} seconds..."
@@ -259,48 +596,72 @@ def main():
         noise(radio, args.duration, args.channel)
 
     elif args.mode == "scan_noise":
-        # Configure for noise scanning
-        radio.set_auto_ack(False)
-        radio.dynamic_payloads = False
-        radio.crc_length = RF24_CRC_DISABLED
-        radio.set_retries(0, 0)
-        radio.address_width = 2
-        radio.open_rx_pipe(1, b"\0\x55")
-        radio.open_rx_pipe(0, b"\0\xaa")
+        configure_for_noise(radio)
 
         results = scan_noise(radio, args.duration)
 
         print(f"\nScan complete. Found signals on {len(results)} channels.")
 
         if args.file:
+            # assemble the whole report and hand it to the file in one write
+            parts = [
+                f"RF Noise Scan - {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+                "=" * 50 + "\n\n",
+            ]
+            for channel, signals in results.items():
+                parts.append(f"Channel {channel}: {len(signals)} signals\n")
+                parts.extend(
+                    f"  {address_repr(signal, False, ' ')}\n" for signal in signals
+                )
             with open(args.file, "w") as f:
-                f.write(f"RF Noise Scan - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 50 + "\n\n")
-                for channel, signals in results.items():
-                    f.write(f"Channel {channel}: {len(signals)} signals\n")
-                    for signal in signals:
-                        f.write(f"  {address_repr(signal, False, ' ')}\n")
+                f.write("".join(parts))
 
     elif args.mode == "rpd":
-        signals = scan_spectrum(radio, args.duration)
+        if args.second_radio:
+            try:
+                signals = scan_spectrum_split(
+                    radio,
+                    args.second_radio,
+                    args.data_rate,
+                    args.duration,
+                    args.precise_dwell,
+                )
+            except OSError as e:
+                print(f"Error: {e}")
+                return
+        else:
+            signals = scan_spectrum(radio, args.duration, args.precise_dwell)
 
         # Find channels with activity
-        active_channels = [i for i, count in enumerate(signals) if count > 0]
+        active_channels = list(compress(range(126), signals))
 
         print(f"\nFound activity on {len(active_channels)} channels:")
         for channel in active_channels:
             print(f"  Channel {channel}: {signals[channel]} detections")
 
         if args.file:
+            parts = [
+                f"RF Spectrum Scan - {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+                "=" * 50 + "\n\n",
+            ]
+            parts.extend(
+                f"Channel {channel}: {signals[channel]} detections\n"
+                for channel in active_channels
+            )
             with open(args.file, "w") as f:
-                f.write(f"RF Spectrum Scan - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 50 + "\n\n")
-                for channel, count in enumerate(signals):
-                    if count > 0:
-                        f.write(f"Channel {channel}: {count} detections\n")
+                f.write("".join(parts))
 
     else:  # packets mode
-        results = scan_packets(radio, args.duration, args.file)
+        history = load_history(args.history) if args.history else {}
+        prior = history.get(args.data_rate)
+        irq = IrqLine(radio, args.irq_pin) if args.irq_pin is not None else None
+        try:
+            results = scan_packets(
+                radio, args.duration, args.file, prior=prior, irq=irq
+            )
+        finally:
+            if irq is not None:
+                irq.close()
 
         print(f"\nScan complete. Found activity on {len(results)} channels.")
 
@@ -309,18 +670,22 @@ def main():
             for channel, packets in results.items():
                 print(f"Channel {channel}: {len(packets)} packets")
                 for packet in packets[:3]:  # Show first 3 packets
-                    data_str = " ".join(f"{b:02x}" for b in packet["data"])
-                    print(f"  {packet['timestamp']:.3f}: {data_str}")
+                    print(f"  {packet.timestamp / 1e9:.6f}: {packet.data.hex(' ')}")
 
         if args.file:
-            with open(args.file, "w") as f:
-                f.write(f"RF Packet Scan - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 50 + "\n\n")
-                for channel, packets in results.items():
-                    f.write(f"Channel {channel}: {len(packets)} packets\n")
-                    for packet in packets:
-                        data_str = " ".join(f"{b:02x}" for b in packet["data"])
-                        f.write(f"  {packet['timestamp']:.3f}: {data_str}\n")
+            save_packets(args.file, results)
+
+        # only after the results are safe: a failed cache write must not
+        # cost the capture
+        if args.history:
+            counts = prior or [0] * 126
+            history[args.data_rate] = [
+                counts[ch] + len(results.get(ch, ())) for ch in range(126)
+            ]
+            try:
+                save_history(history, args.history)
+            except OSError as e:
+                print(f"Warning: could not update history {args.history}: {e}")
 
 
 if __name__ == "__main__":
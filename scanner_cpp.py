@@ -20,30 +20,39 @@ from pyrf24 import (
     RF24_PA_LOW,
 )
 
+# To detect noise, we'll use the worst addresses possible (a reverse engineering tactic).
+# These addresses are designed to confuse the radio into thinking
+# that the RF signal's preamble is part of the packet/payload.
+NOISE_ADDRESSES = (
+    b"\x55\x55",
+    b"\xaa\xaa",
+    b"\x0a\xaa",
+    b"\xa0\xaa",
+    b"\x00\xaa",
+    b"\xab\xaa",
+)
 
-def print_header():
-    """Print the vertical header showing channel numbers"""
-    num_channels = 126
-
-    # print the hundreds digits
-    for i in range(num_channels):
-        print(i // 100, end="")
-    print()
-
-    # print the tens digits
-    for i in range(num_channels):
-        print((i % 100) // 10, end="")
-    print()
+# Display glyph for every possible (byte sized) signal count: "-" for none,
+# then hex digits clamped at "F", so rendering is one lookup with no branches
+HEX_LUT = b"-123456789ABCDEF" + b"F" * 240
+
+# The vertical channel number header. It only depends on the channel count,
+# so it's built once here rather than printed a character at a time.
+HEADER = (
+    "".join(str(i // 100) for i in range(126))  # the hundreds digits
+    + "\n"
+    + "".join(str((i % 100) // 10) for i in range(126))  # the tens digits
+    + "\n"
+    + "".join(str(i % 10) for i in range(126))  # the singles digits
+    + "\n"
+    + "~" * 126  # the header's divider
+    + "\n"
+)
 
-    # print the singles digits
-    for i in range(num_channels):
-        print(i % 10, end="")
-    print()
 
-    # print the header's divider
-    for i in range(num_channels):
-        print("~", end="")
-    print()
+def print_header():
+    """Print the vertical header showing channel numbers"""
+    sys.stdout.write(HEADER)
 
 
 def main():
@@ -99,19 +108,8 @@ def main():
         2
     )  # A reverse engineering tactic (not typically recommended)
 
-    # To detect noise, we'll use the worst addresses possible (a reverse engineering tactic).
-    # These addresses are designed to confuse the radio into thinking
-    # that the RF signal's preamble is part of the packet/payload.
-    noise_addresses = [
-        b"\x55\x55",
-        b"\xaa\xaa",
-        b"\x0a\xaa",
-        b"\xa0\xaa",
-        b"\x00\xaa",
-        b"\xab\xaa",
-    ]
-
-    for i, addr in enumerate(noise_addresses):
+    # Listen on all of the noise addresses, one per pipe
+    for i, addr in enumerate(NOISE_ADDRESSES):
         radio.open_rx_pipe(i, addr)
 
     # Get into standby mode
@@ -121,10 +119,12 @@ def main():
 
     # Channel info
     num_channels = 126  # 0-125 are supported
-    values = [
-        0
-    ] * num_channels  # the array to store summary of signal counts per channel
     num_reps = 100  # number of passes for each scan of the entire spectrum
+    # the array to store summary of signal counts per channel; counts never
+    # exceed num_reps, so one byte per channel is enough and it can be
+    # cleared in place with a single memcpy from a zeroed template
+    values = bytearray(num_channels)
+    no_values = bytes(num_channels)
 
     # print the vertical header
     print_header()
@@ -133,7 +133,7 @@ def main():
     try:
         while True:
             # Clear measurement values
-            values = [0] * num_channels
+            values[:] = no_values
 
             # Scan all channels num_reps times
             rep_counter = num_reps
@@ -149,18 +149,14 @@ def main():
                     radio.listen = False
 
                     # Did we get a signal?
-                    if found_signal or radio.test_rpd() or radio.available():
+                    if found_signal or radio.available():
                         values[i] += 1
                         radio.flush_rx()  # discard packets of noise
 
-                    # output the summary/snapshot for this channel
-                    if values[i]:
-                        # Print out channel measurements, clamped to a single hex digit
-                        print(f"{min(0xF, values[i]):X}", end="", flush=True)
-                    else:
-                        print("-", end="", flush=True)
-
-                print("\r", end="", flush=True)
+                # output the summary/snapshot for the whole pass in a single
+                # write: map every count through HEX_LUT in one C-level call
+                sys.stdout.write(values.translate(HEX_LUT).decode() + "\r")
+                sys.stdout.flush()
                 rep_counter -= 1
 
             print()
@@ -4,8 +4,12 @@ Channel scanner with Rich display - Python port of the C++ scanner example
 Uses Rich for better terminal output and real-time spectrum display
 """
 
+import argparse
 import sys
 import time
+from collections import deque
+from functools import partial
+from itertools import compress
 
 from pyrf24 import (
     RF24,
@@ -15,7 +19,7 @@ from pyrf24 import (
     RF24_CRC_DISABLED,
     RF24_PA_LOW,
 )
-from rich.console import Console
+from rich.console import Console, Group
 from rich.layout import Layout
 from rich.live import Live
 from rich.panel import Panel
@@ -23,17 +27,97 @@ from rich.progress import BarColumn, Progress, TextColumn
 from rich.table import Table
 from rich.text import Text
 
+# data rate choice -> (pyrf24 constant, display name)
+DATA_RATES = {
+    "1": (RF24_1MBPS, "1 Mbps"),
+    "2": (RF24_2MBPS, "2 Mbps"),
+    "250": (RF24_250KBPS, "250 kbps"),
+}
+
+# Display glyph for every possible (byte sized) signal count: "-" for none,
+# then hex digits clamped at "F", so rendering is one lookup with no branches
+HEX_LUT = b"-123456789ABCDEF" + b"F" * 240
+
+# How long RX must settle on a channel before RPD is meaningful
+RPD_SETTLE_NS = 130_000
+
+# "Worst possible" pipe addresses, mistaken for a preamble by the radio
+NOISE_ADDRESSES = (
+    b"\x55\x55",
+    b"\xaa\xaa",
+    b"\x0a\xaa",
+    b"\xa0\xaa",
+    b"\x00\xaa",
+    b"\xab\xaa",
+)
+
+# Minimum seconds between mid-sweep repaints (~4 Hz); each one renders the
+# whole layout in the scan thread
+REFRESH_INTERVAL = 0.25
+
+# Channel numbers as text, for joining into the active channel summary
+CHANNEL_STRS = tuple(str(i) for i in range(126))
+
+
+def spin_wait(ns):
+    """Busy-wait for ``ns`` nanoseconds
+
+    Much more accurate than ``time.sleep()`` for sub-millisecond waits, whose
+    scheduler wake-up adds tens of microseconds of jitter, at the cost of
+    keeping a core busy.
+    """
+    deadline = time.perf_counter_ns() + ns
+    while time.perf_counter_ns() < deadline:
+        pass
+
+
+def rpd_settle(precise_dwell=False):
+    """Return a callable that waits out :data:`RPD_SETTLE_NS`"""
+    if precise_dwell:
+        return partial(spin_wait, RPD_SETTLE_NS)
+    return partial(time.sleep, RPD_SETTLE_NS / 1e9)
+
 
 class SpectrumDisplay:
+    # How many sweeps the peak hold line remembers
+    PEAK_SWEEPS = 32
+
+    # fixed attributes, so skip the per-instance __dict__
+    __slots__ = (
+        "console",
+        "num_channels",
+        "num_reps",
+        "values",
+        "_no_values",
+        "current_rep",
+        "header_text",
+        "spectrum_text",
+        "summary_text",
+        "history",
+        "peak_text",
+    )
+
     def __init__(self, console):
         self.console = console
         self.num_channels = 126
-        self.values = [0] * self.num_channels
         self.num_reps = 100
+        # counts are reset every num_reps passes, so they fit in a byte; a
+        # bytearray avoids boxing an int per update and resets in place
+        self.values = bytearray(self.num_channels)
+        self._no_values = bytes(self.num_channels)
         self.current_rep = 0
-
-    def create_header(self):
-        """Create the channel number header"""
+        # the header only depends on num_channels, so build it just once
+        self.header_text = self._build_header()
+        # the line is only "-" and hex digits, so one unstyled Text is reused
+        # and its plain text swapped each rep instead of parsing new markup
+        self.spectrum_text = Text("", no_wrap=True)
+        self.summary_text = Text("", style="green")
+        # counts of the last PEAK_SWEEPS completed sweeps, for the peak hold
+        self.history = deque(maxlen=self.PEAK_SWEEPS)
+        self.peak_text = Text("", style="dim", no_wrap=True)
+
+    def _build_header(self):
+        """Build the channel number header text"""
         # Hundreds digits
         hundreds = "".join(str(i // 100) for i in range(self.num_channels))
         # Tens digits
@@ -45,25 +129,28 @@ class SpectrumDisplay:
 
         return f"{hundreds}\n{tens}\n{singles}\n{divider}"
 
+    def create_header(self):
+        """Create the channel number header"""
+        return self.header_text
+
     def create_spectrum_line(self):
         """Create the current spectrum line"""
-        line = ""
-        for i in range(self.num_channels):
-            if self.values[i]:
-                # Print hex digit, clamped to F
-                line += f"{min(0xF, self.values[i]):X}"
-            else:
-                line += "-"
-        return line
-
-    def update_channel(self, channel, found_signal):
-        """Update a single channel's value"""
-        if found_signal:
-            self.values[channel] += 1
+        # map every count to its glyph in one C-level pass
+        return self.values.translate(HEX_LUT).decode()
+
+    def record_sweep(self):
+        """Keep a snapshot of the finished sweep's counts"""
+        self.history.append(bytes(self.values))
+
+    def create_peak_line(self):
+        """Create the line of each channel's highest count in the history"""
+        # _no_values as a first operand keeps max() happy with one snapshot
+        peaks = bytes(map(max, self._no_values, *self.history))
+        return peaks.translate(HEX_LUT).decode()
 
     def reset_values(self):
         """Reset all channel values"""
-        self.values = [0] * self.num_channels
+        self.values[:] = self._no_values
         self.current_rep = 0
 
     def increment_rep(self):
@@ -75,19 +162,16 @@ class SpectrumDisplay:
         return self.current_rep >= self.num_reps
 
 
-def scan_spectrum(radio, console, data_rate="1"):
-    """Main scanning function with Rich display"""
+def scan_spectrum(radio, console, data_rate="1", precise_dwell=False):
+    """Main scanning function with Rich display
+
+    :param bool precise_dwell: Spin through the 130us RPD dwell instead of
+        sleeping, see :func:`spin_wait`.
+    """
 
     # Configure radio
-    if data_rate == "2":
-        radio.setDataRate(RF24_2MBPS)
-        rate_text = "2 Mbps"
-    elif data_rate == "250":
-        radio.setDataRate(RF24_250KBPS)
-        rate_text = "250 kbps"
-    else:
-        radio.setDataRate(RF24_1MBPS)
-        rate_text = "1 Mbps"
+    rate, rate_text = DATA_RATES.get(data_rate, DATA_RATES["1"])
+    radio.setDataRate(rate)
 
     # Configure for noise detection
     radio.set_auto_ack(False)
@@ -95,16 +179,7 @@ def scan_spectrum(radio, console, data_rate="1"):
     radio.setAddressWidth(2)
 
     # Use multiple noise addresses
-    noise_addresses = [
-        b"\x55\x55",
-        b"\xaa\xaa",
-        b"\x0a\xaa",
-        b"\xa0\xaa",
-        b"\x00\xaa",
-        b"\xab\xaa",
-    ]
-
-    for i, addr in enumerate(noise_addresses):
+    for i, addr in enumerate(NOISE_ADDRESSES):
         radio.open_rx_pipe(i, addr)
 
     # Get into standby mode
@@ -132,56 +207,86 @@ def scan_spectrum(radio, console, data_rate="1"):
         Panel(display.create_header(), title="Channels", border_style="green")
     )
 
+    # The spectrum panel is built once; each rep only swaps the text of the
+    # lines and summary inside it. The dim peak hold line sits under the live
+    # one; it is labelled in the subtitle since a prefix would shift it out of
+    # line with the channel columns.
+    spectrum_text = display.spectrum_text
+    peak_text = display.peak_text
+    summary_text = display.summary_text
+    layout["spectrum"].update(
+        Panel(
+            Group(spectrum_text, peak_text, Text(""), summary_text),
+            title="Signal Strength",
+            subtitle=f"[dim]2nd line: peak of last {display.PEAK_SWEEPS} sweeps[/dim]",
+            border_style="yellow",
+        )
+    )
+
+    # Bind everything the hot loop touches to locals up front. values is
+    # reset in place, so this reference stays valid across sweeps.
+    channels = range(display.num_channels)
+    values = display.values
+    settle = rpd_settle(precise_dwell)
+    test_rpd = radio.testRPD
+    available = radio.available
+    flush_rx = radio.flush_rx
+    now = time.perf_counter
+
     try:
-        with Live(layout, console=console, refresh_per_second=10) as live:
+        # Paint explicitly rather than from Live's timer thread: at most every
+        # REFRESH_INTERVAL during a sweep, and always once it completes
+        with Live(layout, console=console, auto_refresh=False) as live:
+            live.refresh()  # paint the header before the first rep completes
+            last_refresh = now()
             while True:
                 # Clear measurement values
                 display.reset_values()
 
                 # Scan all channels
                 while not display.is_rep_complete():
-                    for channel in range(display.num_channels):
+                    for channel in channels:
+                        # Already saturated at the display's 0xF; further
+                        # dwells on this channel can't change what is shown
+                        if values[channel] >= 0xF:
+                            continue
+
                         # Select this channel
                         radio.channel = channel
 
                         # Listen for a little
                         radio.listen = True
-                        time.sleep(0.00013)  # 130 microseconds
-                        found_signal = radio.testRPD()
+                        settle()  # 130 microseconds
+                        found_signal = test_rpd()
                         radio.listen = False
 
-                        # Check for signal using multiple methods
-                        if found_signal or radio.testRPD() or radio.available():
-                            display.update_channel(channel, True)
-                            radio.flush_rx()  # discard packets of noise
+                        # RPD was already sampled above; only fall back to
+                        # the RX FIFO rather than re-reading the register
+                        if found_signal or available():
+                            values[channel] += 1
+                            flush_rx()  # discard packets of noise
 
                     display.increment_rep()
 
                     # Update spectrum display
-                    spectrum_line = display.create_spectrum_line()
-                    layout["spectrum"].update(
-                        Panel(
-                            spectrum_line,
-                            title="Signal Strength",
-                            border_style="yellow",
-                        )
-                    )
-
-                # Show summary
-                active_channels = [
-                    i for i, count in enumerate(display.values) if count > 0
-                ]
+                    spectrum_text.plain = display.create_spectrum_line()
+                    if now() - last_refresh >= REFRESH_INTERVAL:
+                        live.refresh()
+                        last_refresh = now()
+
+                display.record_sweep()
+                peak_text.plain = display.create_peak_line()
+
+                # Show summary. It stays up while the next sweep runs, so
+                # the scan goes straight on without pausing to display it.
+                # non-zero counts select their channel numbers in one C pass
+                active_channels = ", ".join(compress(CHANNEL_STRS, values))
                 if active_channels:
-                    summary = f"Active channels: {', '.join(map(str, active_channels))}"
-                    layout["spectrum"].update(
-                        Panel(
-                            f"{spectrum_line}\n\n[green]{summary}[/green]",
-                            title="Signal Strength",
-                            border_style="yellow",
-                        )
-                    )
-
-                time.sleep(0.1)  # Brief pause between scans
+                    summary_text.plain = f"Active channels: {active_channels}"
+                else:
+                    summary_text.plain = ""
+                live.refresh()
+                last_refresh = now()
 
     except KeyboardInterrupt:
         console.print(
@@ -191,6 +296,14 @@ def scan_spectrum(radio, console, data_rate="1"):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="nRF24L01 channel scanner")
+    parser.add_argument(
+        "--precise-dwell",
+        action="store_true",
+        help="Busy-wait the 130us RPD dwell for accurate timing (uses a full core)",
+    )
+    args = parser.parse_args()
+
     console = Console()
     console.print(f"[bold blue]{sys.argv[0]}[/bold blue]")
 
@@ -231,7 +344,7 @@ def main():
         rate = "1"
 
     # Start scanning
-    scan_spectrum(radio, console, rate)
+    scan_spectrum(radio, console, rate, args.precise_dwell)
     return 0
 
 
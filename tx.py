@@ -81,7 +81,11 @@ def master(count: int = 5):  # count = 5 will only transmit 5 packets
                 f"{(end_timer - start_timer) / 1000} us. Sent: {payload[0]}",
             )
             payload[0] += 0.01
-        time.sleep(1)
+        # write() blocks until the transmission finishes, so only sleep for
+        # whatever is left of the 1 second interval
+        remaining = 1 - (time.monotonic_ns() - start_timer) / 1e9
+        if remaining > 0:
+            time.sleep(remaining)
         count -= 1
 
     # recommended behavior is to keep radio in TX mode while idle